@@ -9,7 +9,7 @@ import scipy.constants as pc
 from dargs import Argument
 from dpdispatcher import Machine, Resources, Submission, Task
 
-from dpti.lib.dump import system_data
+from dpti.lib.dump import iter_system_data, system_data
 
 # import dpti
 from dpti.lib.lammps import get_last_dump, get_natoms, get_thermo
@@ -18,12 +18,13 @@ from dpti.lib.lmp import from_system_data
 # sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
 from dpti.lib.utils import (
     block_avg,
+    block_avg_multi,
     create_dict_not_empty_key,
     create_path,
     get_task_file_abspath,
     relative_link_file,
 )
-from dpti.lib.water import compute_bonds, posi_diff
+from dpti.lib.water import compute_angles, compute_bond_pairs
 
 # from lib import dump
 # from .lib import lammps
@@ -46,33 +47,33 @@ def gen_equi_header(
     pres=None,
     custom_variables=None,
 ):
-    ret = ""
-    ret += "clear\n"
-    ret += "# --------------------- VARIABLES-------------------------\n"
-    ret += "variable        NSTEPS          equal %d\n" % nsteps
-    ret += "variable        THERMO_FREQ     equal %d\n" % thermo_freq
-    ret += "variable        DUMP_FREQ       equal %d\n" % dump_freq
-    ret += "variable        NREPEAT         equal ${NSTEPS}/${DUMP_FREQ}\n"
-    ret += f"variable        TEMP            equal {temp:.6f}\n"
+    ret = []
+    ret.append("clear\n")
+    ret.append("# --------------------- VARIABLES-------------------------\n")
+    ret.append(f"variable        NSTEPS          equal {int(nsteps)}\n")
+    ret.append(f"variable        THERMO_FREQ     equal {int(thermo_freq)}\n")
+    ret.append(f"variable        DUMP_FREQ       equal {int(dump_freq)}\n")
+    ret.append("variable        NREPEAT         equal ${NSTEPS}/${DUMP_FREQ}\n")
+    ret.append(f"variable        TEMP            equal {temp:.6f}\n")
     if custom_variables is not None:
         for key, value in custom_variables.items():
-            ret += f"variable        {key}            equal {value}\n"
+            ret.append(f"variable        {key}            equal {value}\n")
     # if equi_settings['pres'] is not None :
     if pres is not None:
-        ret += f"variable        PRES            equal {pres:.6f}\n"
-    ret += f"variable        TAU_T           equal {tau_t:.6f}\n"
-    ret += f"variable        TAU_P           equal {tau_p:.6f}\n"
-    ret += "# ---------------------- INITIALIZAITION ------------------\n"
-    ret += "units           metal\n"
-    ret += "boundary        p p p\n"
-    ret += "atom_style      atomic\n"
-    ret += "# --------------------- ATOM DEFINITION ------------------\n"
-    ret += "box             tilt large\n"
-    ret += f"read_data       {equi_conf}\n"
-    ret += "change_box      all triclinic\n"
+        ret.append(f"variable        PRES            equal {pres:.6f}\n")
+    ret.append(f"variable        TAU_T           equal {tau_t:.6f}\n")
+    ret.append(f"variable        TAU_P           equal {tau_p:.6f}\n")
+    ret.append("# ---------------------- INITIALIZAITION ------------------\n")
+    ret.append("units           metal\n")
+    ret.append("boundary        p p p\n")
+    ret.append("atom_style      atomic\n")
+    ret.append("# --------------------- ATOM DEFINITION ------------------\n")
+    ret.append("box             tilt large\n")
+    ret.append(f"read_data       {equi_conf}\n")
+    ret.append("change_box      all triclinic\n")
     for jj in range(len(mass_map)):
-        ret += "mass            %d %.6f\n" % (jj + 1, mass_map[jj])
-    return ret
+        ret.append(f"mass            {jj + 1:d} {mass_map[jj]:.6f}\n")
+    return "".join(ret)
 
 
 # def gen_equi_force_field(model, if_meam=None):
@@ -91,73 +92,89 @@ def gen_equi_force_field(model, if_meam=False, meam_model=None, append=None):
     #     raise ValueError(f" model_type:{model_type} must be in ['deepmd', 'meam'];"
     #         f"equi_settings:{equi_settings}")
 
-    ret = ""
-    ret += "# --------------------- FORCE FIELDS ---------------------\n"
+    ret = []
+    ret.append("# --------------------- FORCE FIELDS ---------------------\n")
     if not if_meam:
-        ret += f"pair_style      deepmd {model}"
+        ret.append(f"pair_style      deepmd {model}")
         if append is not None:
-            ret += " " + append
-        ret += "\n"
-        ret += "pair_coeff * *\n"
+            ret.append(" " + append)
+        ret.append("\n")
+        ret.append("pair_coeff * *\n")
     else:
         meam_library = meam_model["library"]
         meam_potential = meam_model["potential"]
         meam_element = meam_model["element"]
-        ret += "pair_style      meam\n"
-        ret += f"pair_coeff      * * {meam_library} {meam_element} {meam_potential} {meam_element}\n"
-    return ret
+        ret.append("pair_style      meam\n")
+        ret.append(
+            f"pair_coeff      * * {meam_library} {meam_element} {meam_potential} {meam_element}\n"
+        )
+    return "".join(ret)
 
 
 def gen_equi_thermo_settings(timestep):
-    ret = ""
-    ret += "# --------------------- MD SETTINGS ----------------------\n"
-    ret += "neighbor        1.0 bin\n"
-    ret += f"timestep        {timestep:.6f}\n"
-    ret += "thermo          ${THERMO_FREQ}\n"
-    ret += "compute         allmsd all msd\n"
-    ret += "thermo_style    custom step ke pe etotal enthalpy temp press vol lx ly lz xy xz yz pxx pyy pzz pxy pxz pyz c_allmsd[*]\n"
-    return ret
+    ret = []
+    ret.append("# --------------------- MD SETTINGS ----------------------\n")
+    ret.append("neighbor        1.0 bin\n")
+    ret.append(f"timestep        {timestep:.6f}\n")
+    ret.append("thermo          ${THERMO_FREQ}\n")
+    ret.append("compute         allmsd all msd\n")
+    ret.append(
+        "thermo_style    custom step ke pe etotal enthalpy temp press vol lx ly lz xy xz yz pxx pyy pzz pxy pxz pyz c_allmsd[*]\n"
+    )
+    return "".join(ret)
 
 
 def gen_equi_dump_settings(if_dump_avg_posi):
-    ret = ""
+    ret = []
     if if_dump_avg_posi:
-        ret += "compute         ru all property/atom xu yu zu\n"
-        ret += "fix             ap all ave/atom ${DUMP_FREQ} ${NREPEAT} ${NSTEPS} c_ru[1] c_ru[2] c_ru[3]\n"
-        ret += "dump            fp all custom ${NSTEPS} dump.avgposi id type f_ap[1] f_ap[2] f_ap[3]\n"
-    ret += (
+        ret.append("compute         ru all property/atom xu yu zu\n")
+        ret.append(
+            "fix             ap all ave/atom ${DUMP_FREQ} ${NREPEAT} ${NSTEPS} c_ru[1] c_ru[2] c_ru[3]\n"
+        )
+        ret.append(
+            "dump            fp all custom ${NSTEPS} dump.avgposi id type f_ap[1] f_ap[2] f_ap[3]\n"
+        )
+    ret.append(
         "dump            1 all custom ${DUMP_FREQ} dump.equi id type x y z vx vy vz\n"
     )
-    return ret
+    return "".join(ret)
 
 
 def gen_equi_ensemble_settings(ens):
     # ens = equi_settings['ens']
-    ret = ""
+    ret = []
     if ens == "nvt":
-        ret += "fix             1 all nvt temp ${TEMP} ${TEMP} ${TAU_T}\n"
+        ret.append("fix             1 all nvt temp ${TEMP} ${TEMP} ${TAU_T}\n")
     elif ens == "npt-iso" or ens == "npt":
-        ret += "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} iso ${PRES} ${PRES} ${TAU_P}\n"
+        ret.append(
+            "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} iso ${PRES} ${PRES} ${TAU_P}\n"
+        )
     elif ens == "npt-xy":
-        ret += "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} aniso ${PRES} ${PRES} ${TAU_P} couple xy\n"
+        ret.append(
+            "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} aniso ${PRES} ${PRES} ${TAU_P} couple xy\n"
+        )
     elif ens == "npt-aniso":
-        ret += "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} aniso ${PRES} ${PRES} ${TAU_P}\n"
+        ret.append(
+            "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} aniso ${PRES} ${PRES} ${TAU_P}\n"
+        )
     elif ens == "npt-tri":
-        ret += "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} tri ${PRES} ${PRES} ${TAU_P}\n"
+        ret.append(
+            "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} tri ${PRES} ${PRES} ${TAU_P}\n"
+        )
     elif ens == "nve":
-        ret += "fix             1 all nve\n"
+        ret.append("fix             1 all nve\n")
     else:
         raise RuntimeError(f"unknow ensemble {ens}\n")
-    ret += "fix             mzero all momentum 10 linear 1 1 1\n"
-    ret += "# --------------------- INITIALIZE -----------------------\n"
-    ret += "velocity        all create ${TEMP} %d\n" % (
-        np.random.default_rng().integers(1, 2**16)
+    ret.append("fix             mzero all momentum 10 linear 1 1 1\n")
+    ret.append("# --------------------- INITIALIZE -----------------------\n")
+    ret.append(
+        f"velocity        all create ${{TEMP}} {np.random.default_rng().integers(1, 2**16):d}\n"
     )
-    ret += "velocity        all zero linear\n"
-    ret += "# --------------------- RUN ------------------------------\n"
-    ret += "run             ${NSTEPS}\n"
-    ret += "write_data      out.lmp\n"
-    return ret
+    ret.append("velocity        all zero linear\n")
+    ret.append("# --------------------- RUN ------------------------------\n")
+    ret.append("run             ${NSTEPS}\n")
+    ret.append("write_data      out.lmp\n")
+    return "".join(ret)
 
 
 def gen_equi_lammps_input(
@@ -451,70 +468,57 @@ def make_task(
 
 def water_bond(iter_name, skip=1):
     fdump = os.path.join(iter_name, "dump.equi")
-    with open(fdump) as f:
-        lines = f.read().split("\n")
-    # lines = open(fdump).read().split('\n')
-    sections = []
-    for ii in range(len(lines)):
-        if "ITEM: TIMESTEP" in lines[ii]:
-            sections.append(ii)
-    sections.append(len(lines) - 1)
+    nframes = 0
+    last_cell = None
     all_rr = []
     all_tt = []
-    for ii in range(skip, len(sections) - 1):
-        sys_data = system_data(lines[sections[ii] : sections[ii + 1]])
+    for ii, sys_data in enumerate(iter_system_data(fdump, skip=skip), start=skip):
+        nframes += 1
         atype = sys_data["atom_types"]
         posis = sys_data["coordinates"]
         cell = sys_data["cell"]
-        bonds = compute_bonds(cell, atype, posis)
+        # the cell is fixed in the nvt ensemble, only invert it on change
+        if last_cell is None or not np.array_equal(cell, last_cell):
+            last_cell = cell
+            inv_cell = np.linalg.inv(cell)
+        i_idx, h_idx, bond_o, bond_h = compute_bond_pairs(
+            cell, atype, posis, inv_box=inv_cell
+        )
         if ii == skip:
-            bonds_0 = bonds
+            bond_o_0, bond_h_0 = bond_o, bond_h
         else:
-            if bonds_0 != bonds:
+            if not (
+                np.array_equal(bond_o_0, bond_o) and np.array_equal(bond_h_0, bond_h)
+            ):
                 print("proton trans detected at frame %d" % ii)
-        rr = []
-        tt = []
-        for ii in range(len(bonds)):
-            if atype[ii] == 1:
-                i_idx = ii
-                j_idx = bonds[i_idx][0]
-                k_idx = bonds[i_idx][1]
-                drj = posi_diff(cell, posis[i_idx], posis[j_idx])
-                drk = posi_diff(cell, posis[i_idx], posis[k_idx])
-                ndrj = np.linalg.norm(drj)
-                ndrk = np.linalg.norm(drk)
-                rr.append(ndrj)
-                rr.append(ndrk)
-                tt.append(np.arccos(np.dot(drj, drk) / (ndrj * ndrk)))
-        all_rr += rr
-        all_tt += tt
-    print(
-        "# statistics over %d frames %d angles"
-        % (len(sections) - 1 - skip, len(all_tt))
-    )
-    return (np.average(all_rr)), (np.average(all_tt))
+        nbonds = np.bincount(bond_o, minlength=len(i_idx))
+        if np.any(nbonds < 2):
+            raise RuntimeError(f"found an O atom with less than two H at frame {ii}")
+        # the first two H atoms bonded to each O atom
+        first = np.cumsum(nbonds) - nbonds
+        j_idx = h_idx[bond_h[first]]
+        k_idx = h_idx[bond_h[first + 1]]
+        rr, tt = compute_angles(cell, inv_cell, posis, i_idx, j_idx, k_idx)
+        all_rr.append(rr)
+        all_tt.append(tt)
+    nangles = sum(len(tt) for tt in all_tt)
+    print("# statistics over %d frames %d angles" % (nframes, nangles))
+    if nangles == 0:
+        # nothing left after skip, as np.average of an empty list
+        return np.nan, np.nan
+    return np.concatenate(all_rr).mean(), np.concatenate(all_tt).mean()
 
 
 def _compute_thermo(lmplog, natoms, stat_skip, stat_bsize):
     # print(3939, natoms)
     data = get_thermo(lmplog)
-    ea, ee = block_avg(data[:, 3], skip=stat_skip, block_size=stat_bsize)
-    ha, he = block_avg(data[:, 4], skip=stat_skip, block_size=stat_bsize)
-    ta, te = block_avg(data[:, 5], skip=stat_skip, block_size=stat_bsize)
-    pa, pe = block_avg(data[:, 6], skip=stat_skip, block_size=stat_bsize)
-    va, ve = block_avg(data[:, 7], skip=stat_skip, block_size=stat_bsize)
-    lxx, lxxe = block_avg(data[:, 8], skip=stat_skip, block_size=stat_bsize)
-    lyy, lyye = block_avg(data[:, 9], skip=stat_skip, block_size=stat_bsize)
-    lzz, lzze = block_avg(data[:, 10], skip=stat_skip, block_size=stat_bsize)
-    lxy, lxye = block_avg(data[:, 11], skip=stat_skip, block_size=stat_bsize)
-    lxz, lxze = block_avg(data[:, 12], skip=stat_skip, block_size=stat_bsize)
-    lyz, lyze = block_avg(data[:, 13], skip=stat_skip, block_size=stat_bsize)
-    pxx, pxxe = block_avg(data[:, 14], skip=stat_skip, block_size=stat_bsize)
-    pyy, pyye = block_avg(data[:, 15], skip=stat_skip, block_size=stat_bsize)
-    pzz, pzze = block_avg(data[:, 16], skip=stat_skip, block_size=stat_bsize)
-    pxy, pxye = block_avg(data[:, 17], skip=stat_skip, block_size=stat_bsize)
-    pxz, pxze = block_avg(data[:, 18], skip=stat_skip, block_size=stat_bsize)
-    pyz, pyze = block_avg(data[:, 19], skip=stat_skip, block_size=stat_bsize)
+    avgs, errs = block_avg_multi(data[:, 3:20], skip=stat_skip, block_size=stat_bsize)
+    ea, ha, ta, pa, va = avgs[:5]
+    ee, he, te, pe, ve = errs[:5]
+    lxx, lyy, lzz, lxy, lxz, lyz = avgs[5:11]
+    lxxe, lyye, lzze, lxye, lxze, lyze = errs[5:11]
+    pxx, pyy, pzz, pxy, pxz, pyz = avgs[11:17]
+    pxxe, pyye, pzze, pxye, pxze, pyze = errs[11:17]
     thermo_info = {}
     thermo_info["p"] = pa
     thermo_info["p_err"] = pe
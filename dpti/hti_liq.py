@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
-import glob
 import json
+import multiprocessing
 import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import numpy as np
 import scipy.constants as pc
@@ -15,6 +16,7 @@ from dpti import einstein, hti
 from dpti.lib.lammps import get_thermo
 from dpti.lib.utils import (
     block_avg,
+    block_avg_multi,
     create_path,
     get_first_matched_key_from_dict,
     integrate,
@@ -28,115 +30,130 @@ def make_iter_name(iter_index):
     return "task_hti." + ("%04d" % iter_index)
 
 
-def _ff_soft_on(lamb, sparam):
+def _gen_sigma_key_index(element_num):
+    # the (i, j) element pairs with i <= j
+    return [(i, j) for i in range(element_num) for j in range(i, element_num)]
+
+
+def _ff_soft_on(lamb, sparam, sigma_key_index=None):
     nn = sparam["n"]
     alpha_lj = sparam["alpha_lj"]
     rcut = sparam["rcut"]
     epsilon = sparam["epsilon"]
     # sigma = sparam['sigma']
     activation = sparam["activation"]
-    ret = ""
-    ret += f"variable        EPSILON equal {epsilon:f}\n"
-    ret += f"pair_style      lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n"
-
-    element_num = sparam.get("element_num", 1)
-    sigma_key_index = filter(
-        lambda t: t[0] <= t[1],
-        ((i, j) for i in range(element_num) for j in range(element_num)),
-    )
+    ret = []
+    ret.append(f"variable        EPSILON equal {epsilon:f}\n")
+    ret.append(f"pair_style      lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n")
+
+    if sigma_key_index is None:
+        sigma_key_index = _gen_sigma_key_index(sparam.get("element_num", 1))
     for i, j in sigma_key_index:
-        ret += "pair_coeff      {} {} ${{EPSILON}} {:f} {:f}\n".format(
-            i + 1,
-            j + 1,
-            sparam["sigma_" + str(i) + "_" + str(j)],
-            activation,
+        ret.append(
+            f"pair_coeff      {i + 1} {j + 1} ${{EPSILON}} {sparam[f'sigma_{i}_{j}']:f} {activation:f}\n"
         )
 
     # ret += 'pair_coeff      * * ${EPSILON} %f %f\n' % (sigma, activation)
-    ret += "fix             tot_pot all adapt/fep 0 pair lj/cut/soft epsilon * * v_LAMBDA scale yes\n"
-    ret += "compute         e_diff all fep ${TEMP} pair lj/cut/soft epsilon * * v_EPSILON\n"
-    return ret
+    ret.append(
+        "fix             tot_pot all adapt/fep 0 pair lj/cut/soft epsilon * * v_LAMBDA scale yes\n"
+    )
+    ret.append(
+        "compute         e_diff all fep ${TEMP} pair lj/cut/soft epsilon * * v_EPSILON\n"
+    )
+    return "".join(ret)
 
 
-def _ff_deep_on(lamb, sparam, model, if_meam=False, meam_model=None):
+def _ff_deep_on(
+    lamb, sparam, model, if_meam=False, meam_model=None, sigma_key_index=None
+):
     nn = sparam["n"]
     alpha_lj = sparam["alpha_lj"]
     rcut = sparam["rcut"]
     epsilon = sparam["epsilon"]
     # sigma = sparam['sigma']
     activation = sparam["activation"]
-    ret = ""
-    ret += f"variable        EPSILON equal {epsilon:f}\n"
-    ret += "variable        ONE equal 1\n"
+    ret = []
+    ret.append(f"variable        EPSILON equal {epsilon:f}\n")
+    ret.append("variable        ONE equal 1\n")
     if if_meam:
-        ret += f"pair_style      hybrid/overlay meam lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n"
-        ret += f'pair_coeff      * * meam {meam_model["library"]} {meam_model["element"]} {meam_model["potential"]} {meam_model["element"]}\n'
+        ret.append(
+            f"pair_style      hybrid/overlay meam lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n"
+        )
+        ret.append(
+            f"pair_coeff      * * meam {meam_model['library']} {meam_model['element']} {meam_model['potential']} {meam_model['element']}\n"
+        )
         # ret += f'pair_coeff      * * meam {meam_model[0]} {meam_model[2]} {meam_model[1]} {meam_model[2]}\n'
     else:
-        ret += f"pair_style      hybrid/overlay deepmd {model} lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n"
-        ret += "pair_coeff      * * deepmd\n"
+        ret.append(
+            f"pair_style      hybrid/overlay deepmd {model} lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n"
+        )
+        ret.append("pair_coeff      * * deepmd\n")
 
-    element_num = sparam.get("element_num", 1)
-    sigma_key_index = filter(
-        lambda t: t[0] <= t[1],
-        ((i, j) for i in range(element_num) for j in range(element_num)),
-    )
+    if sigma_key_index is None:
+        sigma_key_index = _gen_sigma_key_index(sparam.get("element_num", 1))
     for i, j in sigma_key_index:
-        ret += "pair_coeff      {} {} lj/cut/soft ${{EPSILON}} {:f} {:f}\n".format(
-            i + 1,
-            j + 1,
-            sparam["sigma_" + str(i) + "_" + str(j)],
-            activation,
+        ret.append(
+            f"pair_coeff      {i + 1} {j + 1} lj/cut/soft ${{EPSILON}} {sparam[f'sigma_{i}_{j}']:f} {activation:f}\n"
         )
 
     # ret += 'pair_coeff      * * lj/cut/soft ${EPSILON} %f %f\n' % (sigma, activation)
     if if_meam:
-        ret += "fix             tot_pot all adapt/fep 0 pair meam scale * * v_LAMBDA\n"
-        ret += "compute         e_diff all fep ${TEMP} pair meam scale * * v_ONE\n"
+        ret.append(
+            "fix             tot_pot all adapt/fep 0 pair meam scale * * v_LAMBDA\n"
+        )
+        ret.append("compute         e_diff all fep ${TEMP} pair meam scale * * v_ONE\n")
     else:
-        ret += (
+        ret.append(
             "fix             tot_pot all adapt/fep 0 pair deepmd scale * * v_LAMBDA\n"
         )
-        ret += "compute         e_diff all fep ${TEMP} pair deepmd scale * * v_ONE\n"
-    return ret
+        ret.append(
+            "compute         e_diff all fep ${TEMP} pair deepmd scale * * v_ONE\n"
+        )
+    return "".join(ret)
 
 
-def _ff_soft_off(lamb, sparam, model, if_meam=False, meam_model=None):
+def _ff_soft_off(
+    lamb, sparam, model, if_meam=False, meam_model=None, sigma_key_index=None
+):
     nn = sparam["n"]
     alpha_lj = sparam["alpha_lj"]
     rcut = sparam["rcut"]
     epsilon = sparam["epsilon"]
     # sigma = sparam['sigma']
     activation = sparam["activation"]
-    ret = ""
-    ret += "variable        INV_LAMBDA equal 1-${LAMBDA}\n"
-    ret += f"variable        EPSILON equal {epsilon:f}\n"
-    ret += "variable        INV_EPSILON equal -${EPSILON}\n"
+    ret = []
+    ret.append("variable        INV_LAMBDA equal 1-${LAMBDA}\n")
+    ret.append(f"variable        EPSILON equal {epsilon:f}\n")
+    ret.append("variable        INV_EPSILON equal -${EPSILON}\n")
     if if_meam:
-        ret += f"pair_style      hybrid/overlay meam lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n"
-        ret += f'pair_coeff      * * meam {meam_model["library"]} {meam_model["element"]} {meam_model["potential"]} {meam_model["element"]}\n'
+        ret.append(
+            f"pair_style      hybrid/overlay meam lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n"
+        )
+        ret.append(
+            f"pair_coeff      * * meam {meam_model['library']} {meam_model['element']} {meam_model['potential']} {meam_model['element']}\n"
+        )
         # ret += f'pair_coeff      * * meam {meam_model[0]} {meam_model[2]} {meam_model[1} {meam_model[2]} \n'
     else:
-        ret += f"pair_style      hybrid/overlay deepmd {model} lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n"
-        ret += "pair_coeff      * * deepmd\n"
+        ret.append(
+            f"pair_style      hybrid/overlay deepmd {model} lj/cut/soft {nn:f} {alpha_lj:f} {rcut:f}\n"
+        )
+        ret.append("pair_coeff      * * deepmd\n")
 
-    element_num = sparam.get("element_num", 1)
-    sigma_key_index = filter(
-        lambda t: t[0] <= t[1],
-        ((i, j) for i in range(element_num) for j in range(element_num)),
-    )
+    if sigma_key_index is None:
+        sigma_key_index = _gen_sigma_key_index(sparam.get("element_num", 1))
     for i, j in sigma_key_index:
-        ret += "pair_coeff      {} {} lj/cut/soft ${{EPSILON}} {:f} {:f}\n".format(
-            i + 1,
-            j + 1,
-            sparam["sigma_" + str(i) + "_" + str(j)],
-            activation,
+        ret.append(
+            f"pair_coeff      {i + 1} {j + 1} lj/cut/soft ${{EPSILON}} {sparam[f'sigma_{i}_{j}']:f} {activation:f}\n"
         )
 
     # ret += 'pair_coeff      * * lj/cut/soft ${EPSILON} %f %f\n' % (sigma, activation)
-    ret += "fix             tot_pot all adapt/fep 0 pair lj/cut/soft epsilon * * v_INV_LAMBDA scale yes\n"
-    ret += "compute         e_diff all fep ${TEMP} pair lj/cut/soft epsilon * * v_INV_EPSILON\n"
-    return ret
+    ret.append(
+        "fix             tot_pot all adapt/fep 0 pair lj/cut/soft epsilon * * v_INV_LAMBDA scale yes\n"
+    )
+    ret.append(
+        "compute         e_diff all fep ${TEMP} pair lj/cut/soft epsilon * * v_INV_EPSILON\n"
+    )
+    return "".join(ret)
 
 
 def _gen_lammps_input_ideal(
@@ -159,74 +176,128 @@ def _gen_lammps_input_ideal(
     norm_style="first",
     if_meam=False,
     meam_model=None,
+    sigma_key_index=None,
+    rng=None,
 ):
-    ret = ""
-    ret += "clear\n"
-    ret += "# --------------------- VARIABLES-------------------------\n"
-    ret += "variable        NSTEPS          equal %d\n" % nsteps
-    ret += "variable        THERMO_FREQ     equal %d\n" % thermo_freq
-    ret += "variable        DUMP_FREQ       equal %d\n" % dump_freq
-    ret += f"variable        TEMP            equal {temp:f}\n"
-    ret += f"variable        PRES            equal {pres:f}\n"
-    ret += f"variable        TAU_T           equal {tau_t:f}\n"
-    ret += f"variable        TAU_P           equal {tau_p:f}\n"
-    ret += f"variable        LAMBDA          equal {lamb:.10e}\n"
-    ret += "variable        ZERO            equal 0\n"
-    ret += "# ---------------------- INITIALIZAITION ------------------\n"
-    ret += "units           metal\n"
-    ret += "boundary        p p p\n"
-    ret += "atom_style      atomic\n"
-    ret += "# --------------------- ATOM DEFINITION ------------------\n"
-    ret += "box             tilt large\n"
-    ret += f"read_data       {conf_file}\n"
+    if rng is None:
+        rng = np.random.default_rng()
+    ret = []
+    ret.append("clear\n")
+    ret.append("# --------------------- VARIABLES-------------------------\n")
+    ret.append(f"variable        NSTEPS          equal {int(nsteps)}\n")
+    ret.append(f"variable        THERMO_FREQ     equal {int(thermo_freq)}\n")
+    ret.append(f"variable        DUMP_FREQ       equal {int(dump_freq)}\n")
+    ret.append(f"variable        TEMP            equal {temp:f}\n")
+    ret.append(f"variable        PRES            equal {pres:f}\n")
+    ret.append(f"variable        TAU_T           equal {tau_t:f}\n")
+    ret.append(f"variable        TAU_P           equal {tau_p:f}\n")
+    ret.append(f"variable        LAMBDA          equal {lamb:.10e}\n")
+    ret.append("variable        ZERO            equal 0\n")
+    ret.append("# ---------------------- INITIALIZAITION ------------------\n")
+    ret.append("units           metal\n")
+    ret.append("boundary        p p p\n")
+    ret.append("atom_style      atomic\n")
+    ret.append("# --------------------- ATOM DEFINITION ------------------\n")
+    ret.append("box             tilt large\n")
+    ret.append(f"read_data       {conf_file}\n")
     if copies is not None:
-        ret += "replicate       %d %d %d\n" % (copies[0], copies[1], copies[2])
-    ret += "change_box      all triclinic\n"
+        ret.append(
+            f"replicate       {int(copies[0])} {int(copies[1])} {int(copies[2])}\n"
+        )
+    ret.append("change_box      all triclinic\n")
     for jj in range(len(mass_map)):
-        ret += "mass            %d %f\n" % (jj + 1, mass_map[jj])
-    ret += "# --------------------- FORCE FIELDS ---------------------\n"
+        ret.append(f"mass            {jj + 1:d} {mass_map[jj]:f}\n")
+    ret.append("# --------------------- FORCE FIELDS ---------------------\n")
     if step == "soft_on":
-        ret += _ff_soft_on(lamb, soft_param)
+        ret.append(_ff_soft_on(lamb, soft_param, sigma_key_index=sigma_key_index))
     elif step == "deep_on":
-        ret += _ff_deep_on(
-            lamb, soft_param, model, if_meam=if_meam, meam_model=meam_model
+        ret.append(
+            _ff_deep_on(
+                lamb,
+                soft_param,
+                model,
+                if_meam=if_meam,
+                meam_model=meam_model,
+                sigma_key_index=sigma_key_index,
+            )
         )
     elif step == "soft_off":
-        ret += _ff_soft_off(
-            lamb, soft_param, model, if_meam=if_meam, meam_model=meam_model
+        ret.append(
+            _ff_soft_off(
+                lamb,
+                soft_param,
+                model,
+                if_meam=if_meam,
+                meam_model=meam_model,
+                sigma_key_index=sigma_key_index,
+            )
         )
     else:
         raise RuntimeError("unknown step")
-    ret += "# --------------------- MD SETTINGS ----------------------\n"
-    ret += "neighbor        1.0 bin\n"
-    ret += f"timestep        {timestep}\n"
-    ret += "compute         allmsd all msd\n"
-    ret += "thermo          ${THERMO_FREQ}\n"
-    ret += "thermo_style    custom step ke pe etotal enthalpy temp press vol c_e_diff[1] c_allmsd[*]\n"
-    ret += "thermo_modify   format 9 %.16e\n"
-    ret += "dump            1 all custom ${DUMP_FREQ} dump.hti id type x y z vx vy vz\n"
+    ret.append("# --------------------- MD SETTINGS ----------------------\n")
+    ret.append("neighbor        1.0 bin\n")
+    ret.append(f"timestep        {timestep}\n")
+    ret.append("compute         allmsd all msd\n")
+    ret.append("thermo          ${THERMO_FREQ}\n")
+    ret.append(
+        "thermo_style    custom step ke pe etotal enthalpy temp press vol c_e_diff[1] c_allmsd[*]\n"
+    )
+    ret.append("thermo_modify   format 9 %.16e\n")
+    ret.append(
+        "dump            1 all custom ${DUMP_FREQ} dump.hti id type x y z vx vy vz\n"
+    )
     if ens == "nvt":
-        ret += "fix             1 all nvt temp ${TEMP} ${TEMP} ${TAU_T}\n"
+        ret.append("fix             1 all nvt temp ${TEMP} ${TEMP} ${TAU_T}\n")
     elif ens == "npt-iso" or ens == "npt":
-        ret += "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} iso ${PRES} ${PRES} ${TAU_P}\n"
+        ret.append(
+            "fix             1 all npt temp ${TEMP} ${TEMP} ${TAU_T} iso ${PRES} ${PRES} ${TAU_P}\n"
+        )
     elif ens == "nve":
-        ret += "fix             1 all nve\n"
+        ret.append("fix             1 all nve\n")
     else:
         raise RuntimeError(f"unknow ensemble {ens}\n")
-    ret += "fix             mzero all momentum 10 linear 1 1 1\n"
-    ret += "# --------------------- INITIALIZE -----------------------\n"
-    ret += "velocity        all create ${TEMP} %d\n" % (
-        np.random.default_rng().integers(1, 2**16)
-    )
-    ret += "velocity        all zero linear\n"
-    ret += "# --------------------- RUN ------------------------------\n"
-    ret += "run             ${NSTEPS}\n"
-    ret += "write_data      out.lmp\n"
-
-    return ret
+    ret.append("fix             mzero all momentum 10 linear 1 1 1\n")
+    ret.append("# --------------------- INITIALIZE -----------------------\n")
+    ret.append(f"velocity        all create ${{TEMP}} {rng.integers(1, 2**16):d}\n")
+    ret.append("velocity        all zero linear\n")
+    ret.append("# --------------------- RUN ------------------------------\n")
+    ret.append("run             ${NSTEPS}\n")
+    ret.append("write_data      out.lmp\n")
+
+    return "".join(ret)
+
+
+def _write_file(fname, content):
+    # unbuffered write, the lammps inputs are written in one go anyway
+    data = content.encode()
+    fd = os.open(fname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data) :]
+    finally:
+        os.close(fd)
+
+
+def _write_task(work_path, lmp_str, lamb, meam_model=None):
+    task_abs_dir = create_path(work_path)
+    os.symlink(os.path.join("..", "conf.lmp"), os.path.join(task_abs_dir, "conf.lmp"))
+    os.symlink(os.path.join("..", "graph.pb"), os.path.join(task_abs_dir, "graph.pb"))
+    if meam_model:
+        meam_library_basename = os.path.basename(meam_model["library"])
+        meam_potential_basename = os.path.basename(meam_model["potential"])
+        os.symlink(
+            os.path.join("..", meam_library_basename),
+            os.path.join(task_abs_dir, meam_library_basename),
+        )
+        os.symlink(
+            os.path.join("..", meam_potential_basename),
+            os.path.join(task_abs_dir, meam_potential_basename),
+        )
+    _write_file(os.path.join(task_abs_dir, "in.lammps"), lmp_str)
+    _write_file(os.path.join(task_abs_dir, "lambda.out"), str(lamb))
 
 
-def _make_tasks(iter_name, jdata, step, if_meam=False, meam_model=None):
+def _make_tasks(iter_name, jdata, step, if_meam=False, meam_model=None, rng=None):
     if step == "soft_on":
         all_lambda = parse_seq(jdata["lambda_soft_on"])
     elif step == "deep_on":
@@ -235,13 +306,8 @@ def _make_tasks(iter_name, jdata, step, if_meam=False, meam_model=None):
         all_lambda = parse_seq(jdata["lambda_soft_off"])
     else:
         raise RuntimeError("unknow step")
-    equi_conf = jdata["equi_conf"]
-    equi_conf = os.path.abspath(equi_conf)
     # mass_map = jdata['mass_map']
     mass_map = get_first_matched_key_from_dict(jdata, ["mass_map", "model_mass_map"])
-    model = jdata.get("model", None)
-    if model:
-        model = os.path.abspath(model)
     soft_param = jdata["soft_param"]
     nsteps = jdata["nsteps"]
     # timestep = jdata['timestep']
@@ -255,8 +321,11 @@ def _make_tasks(iter_name, jdata, step, if_meam=False, meam_model=None):
     if "copies" in jdata:
         copies = jdata["copies"]
     temp = jdata["temp"]
+    if rng is None:
+        rng = np.random.default_rng(jdata.get("seed", None))
 
     sparam = jdata.get("soft_param", {})
+    sigma_key_index = None
     if sparam:
         if "sigma_oo" in sparam:
             sparam["sigma_0_0"] = sparam["sigma_oo"]
@@ -266,10 +335,7 @@ def _make_tasks(iter_name, jdata, step, if_meam=False, meam_model=None):
         element_num = len(mass_map)
         sparam["element_num"] = element_num
 
-        sigma_key_index = filter(
-            lambda t: t[0] <= t[1],
-            ((i, j) for i in range(element_num) for j in range(element_num)),
-        )
+        sigma_key_index = _gen_sigma_key_index(element_num)
         sigma_key_name_list = [
             "sigma_" + str(t[0]) + "_" + str(t[1]) for t in sigma_key_index
         ]
@@ -281,32 +347,21 @@ def _make_tasks(iter_name, jdata, step, if_meam=False, meam_model=None):
     job_abs_dir = create_path(iter_name)
 
     if meam_model:
-        relative_link_file(os.path.abspath(meam_model["library"]), job_abs_dir)
-        relative_link_file(os.path.abspath(meam_model["potential"]), job_abs_dir)
+        relative_link_file(meam_model["library"], job_abs_dir)
+        relative_link_file(meam_model["potential"], job_abs_dir)
         # os.symlink(os.path.join('..', 'conf.lmp'), 'conf.lmp')
         # os.symlink(os.path.join('..', 'graph.pb'), 'graph.pb')
 
-    cwd = os.getcwd()
-    os.chdir(iter_name)
-    os.symlink(os.path.join("..", "in.json"), "in.json")
-    os.symlink(os.path.join("..", "conf.lmp"), "conf.lmp")
-    os.symlink(os.path.join("..", "graph.pb"), "graph.pb")
+    os.symlink(os.path.join("..", "in.json"), os.path.join(job_abs_dir, "in.json"))
+    os.symlink(os.path.join("..", "conf.lmp"), os.path.join(job_abs_dir, "conf.lmp"))
+    os.symlink(os.path.join("..", "graph.pb"), os.path.join(job_abs_dir, "graph.pb"))
 
-    os.chdir(cwd)
     # print(9898, meam_model)
+    # the inputs are generated in order, so that the velocity seeds drawn
+    # from rng are reproducible; only the file system work is threaded
+    all_task_args = []
     for idx, ii in enumerate(all_lambda):
-        work_path = os.path.join(iter_name, "task.%06d" % idx)
-        create_path(work_path)
-        os.chdir(work_path)
-        os.symlink(os.path.join("..", "conf.lmp"), "conf.lmp")
-        os.symlink(os.path.join("..", "graph.pb"), "graph.pb")
-        if meam_model:
-            meam_library_basename = os.path.basename(meam_model["library"])
-            meam_potential_basename = os.path.basename(meam_model["potential"])
-            os.symlink(os.path.join("..", meam_library_basename), meam_library_basename)
-            os.symlink(
-                os.path.join("..", meam_potential_basename), meam_potential_basename
-            )
+        work_path = os.path.join(job_abs_dir, "task.%06d" % idx)
         lmp_str = _gen_lammps_input_ideal(
             step,
             "conf.lmp",
@@ -323,12 +378,17 @@ def _make_tasks(iter_name, jdata, step, if_meam=False, meam_model=None):
             copies=copies,
             if_meam=if_meam,
             meam_model=meam_model,
+            sigma_key_index=sigma_key_index,
+            rng=rng,
+        )
+        all_task_args.append((work_path, lmp_str, ii))
+    max_workers = max(1, min(16, len(all_task_args)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(
+            executor.map(
+                lambda args: _write_task(*args, meam_model=meam_model), all_task_args
+            )
         )
-        with open("in.lammps", "w") as fp:
-            fp.write(lmp_str)
-        with open("lambda.out", "w") as fp:
-            fp.write(str(ii))
-        os.chdir(cwd)
 
 
 def make_tasks(iter_name, jdata, if_meam=None):
@@ -341,35 +401,40 @@ def make_tasks(iter_name, jdata, if_meam=None):
         model = None
     meam_model = jdata.get("meam_model", None)
 
-    create_path(iter_name)
-    copied_conf = os.path.join(os.path.abspath(iter_name), "conf.lmp")
+    iter_abs_dir = create_path(iter_name)
+    copied_conf = os.path.join(iter_abs_dir, "conf.lmp")
     shutil.copyfile(equi_conf, copied_conf)
     # jdata['equi_conf'] = copied_conf
     if model:
-        copied_model = os.path.join(os.path.abspath(iter_name), "graph.pb")
+        copied_model = os.path.join(iter_abs_dir, "graph.pb")
         shutil.copyfile(model, copied_model)
     # jdata['model'] = copied_model
 
-    cwd = os.getcwd()
-    os.chdir(iter_name)
-    with open("in.json", "w") as fp:
+    with open(os.path.join(iter_abs_dir, "in.json"), "w") as fp:
         json.dump(jdata, fp, indent=4)
-    os.chdir(cwd)
-    subtask_name = os.path.join(iter_name, "00.soft_on")
-    _make_tasks(subtask_name, jdata, "soft_on", if_meam=if_meam, meam_model=meam_model)
-    subtask_name = os.path.join(iter_name, "01.deep_on")
-    _make_tasks(subtask_name, jdata, "deep_on", if_meam=if_meam, meam_model=meam_model)
-    subtask_name = os.path.join(iter_name, "02.soft_off")
-    _make_tasks(subtask_name, jdata, "soft_off", if_meam=if_meam, meam_model=meam_model)
+    # one generator for the velocity seeds of all the tasks
+    rng = np.random.default_rng(jdata.get("seed", None))
+    subtask_name = os.path.join(iter_abs_dir, "00.soft_on")
+    _make_tasks(
+        subtask_name, jdata, "soft_on", if_meam=if_meam, meam_model=meam_model, rng=rng
+    )
+    subtask_name = os.path.join(iter_abs_dir, "01.deep_on")
+    _make_tasks(
+        subtask_name, jdata, "deep_on", if_meam=if_meam, meam_model=meam_model, rng=rng
+    )
+    subtask_name = os.path.join(iter_abs_dir, "02.soft_off")
+    _make_tasks(
+        subtask_name, jdata, "soft_off", if_meam=if_meam, meam_model=meam_model, rng=rng
+    )
 
 
-def _compute_thermo(fname, natoms, stat_skip, stat_bsize):
-    data = get_thermo(fname)
-    ea, ee = block_avg(data[:, 3], skip=stat_skip, block_size=stat_bsize)
-    ha, he = block_avg(data[:, 4], skip=stat_skip, block_size=stat_bsize)
-    ta, te = block_avg(data[:, 5], skip=stat_skip, block_size=stat_bsize)
-    pa, pe = block_avg(data[:, 6], skip=stat_skip, block_size=stat_bsize)
-    va, ve = block_avg(data[:, 7], skip=stat_skip, block_size=stat_bsize)
+def _compute_thermo(fname, natoms, stat_skip, stat_bsize, data=None):
+    # data: the already parsed thermo of fname, if available
+    if data is None:
+        data = get_thermo(fname)
+    avgs, errs = block_avg_multi(data[:, 3:8], skip=stat_skip, block_size=stat_bsize)
+    ea, ha, ta, pa, va = avgs
+    ee, he, te, pe, ve = errs
     thermo_info = {}
     thermo_info["p"] = pa
     thermo_info["p_err"] = pe
@@ -387,12 +452,30 @@ def _compute_thermo(fname, natoms, stat_skip, stat_bsize):
     return thermo_info
 
 
+def _read_one_task(task_dir, dump_data_txt=False):
+    log_name = os.path.join(task_dir, "log.lammps")
+    data = get_thermo(log_name)
+    # the parsed thermo is not read back by dpti, only dump it on request
+    if dump_data_txt:
+        np.savetxt(os.path.join(task_dir, "data"), data, fmt="%.6e")
+    lmda_name = os.path.join(task_dir, "lambda.out")
+    with open(lmda_name) as fp:
+        ll = float(fp.read())
+    return ll, data
+
+
 def _post_tasks(iter_name, step, natoms):
     jdata = json.load(open(os.path.join(iter_name, "in.json")))
     stat_skip = jdata["stat_skip"]
     stat_bsize = jdata["stat_bsize"]
-    all_tasks = glob.glob(os.path.join(iter_name, "task.[0-9]*"))
-    all_tasks.sort()
+    dump_data_txt = jdata.get("dump_data_txt", False)
+    with os.scandir(iter_name) as it:
+        all_tasks = [
+            entry.path
+            for entry in it
+            if entry.name.startswith("task.") and entry.name[5:].isdigit()
+        ]
+    all_tasks.sort(key=lambda path: int(path.rsplit(".", 1)[1]))
     ntasks = len(all_tasks)
 
     all_lambda = []
@@ -400,16 +483,21 @@ def _post_tasks(iter_name, step, natoms):
     all_dp_e = []
     all_msd_xyz = []
 
-    for ii in all_tasks:
-        log_name = os.path.join(ii, "log.lammps")
-        data = get_thermo(log_name)
-        np.savetxt(os.path.join(ii, "data"), data, fmt="%.6e")
+    # parsing the lammps logs in worker processes is opt-in, and is not
+    # available from daemonic processes such as celery prefork workers
+    post_workers = min(ntasks, jdata.get("post_workers", 1))
+    dump_flags = [dump_data_txt] * ntasks
+    if post_workers > 1 and not multiprocessing.current_process().daemon:
+        with ProcessPoolExecutor(max_workers=post_workers) as executor:
+            all_results = list(executor.map(_read_one_task, all_tasks, dump_flags))
+    else:
+        all_results = list(map(_read_one_task, all_tasks, dump_flags))
+
+    for ll, data in all_results:
         dp_a, dp_e = block_avg(data[:, 8], skip=stat_skip, block_size=stat_bsize)
         msd_xyz = data[-1, 12]
         dp_a /= natoms
         dp_e /= natoms
-        lmda_name = os.path.join(ii, "lambda.out")
-        ll = float(open(lmda_name).read())
         all_lambda.append(ll)
         all_dp_a.append(dp_a)
         all_dp_e.append(dp_e)
@@ -440,7 +528,11 @@ def _post_tasks(iter_name, step, natoms):
     sys_err = integrate_sys_err(all_lambda, de)
 
     thermo_info = _compute_thermo(
-        os.path.join(all_tasks[-1], "log.lammps"), natoms, stat_skip, stat_bsize
+        os.path.join(all_tasks[-1], "log.lammps"),
+        natoms,
+        stat_skip,
+        stat_bsize,
+        data=all_results[-1][1],
     )
 
     return diff_e, [err, sys_err], thermo_info
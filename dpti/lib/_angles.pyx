@@ -0,0 +1,62 @@
+# cython: language_level=3
+# distances and angles under the minimum image convention, compiled
+# counterpart of dpti.lib.water_numba for machines without llvm
+
+cimport cython
+from libc.math cimport acos, rint, sqrt
+
+import numpy as np
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline void _min_image(
+    double* dr, const double[:, ::1] cell, const double[:, ::1] inv_cell
+) noexcept nogil:
+    # dr is a row vector, cell vectors are the rows of cell
+    cdef double frac[3]
+    cdef Py_ssize_t dd
+    for dd in range(3):
+        frac[dd] = rint(
+            dr[0] * inv_cell[0, dd] + dr[1] * inv_cell[1, dd] + dr[2] * inv_cell[2, dd]
+        )
+    for dd in range(3):
+        dr[dd] -= frac[0] * cell[0, dd] + frac[1] * cell[1, dd] + frac[2] * cell[2, dd]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _angles(
+    const double[:, ::1] pos,
+    const double[:, ::1] cell,
+    const double[:, ::1] inv_cell,
+    const long long[::1] ii,
+    const long long[::1] jj,
+    const long long[::1] kk,
+    double[::1] rr_out,
+    double[::1] tt_out,
+) noexcept nogil:
+    cdef Py_ssize_t n, dd
+    cdef double drj[3]
+    cdef double drk[3]
+    cdef double nj, nk, cos_tt
+    for n in range(ii.shape[0]):
+        for dd in range(3):
+            drj[dd] = pos[ii[n], dd] - pos[jj[n], dd]
+            drk[dd] = pos[ii[n], dd] - pos[kk[n], dd]
+        _min_image(drj, cell, inv_cell)
+        _min_image(drk, cell, inv_cell)
+        nj = sqrt(drj[0] * drj[0] + drj[1] * drj[1] + drj[2] * drj[2])
+        nk = sqrt(drk[0] * drk[0] + drk[1] * drk[1] + drk[2] * drk[2])
+        cos_tt = (drj[0] * drk[0] + drj[1] * drk[1] + drj[2] * drk[2]) / (nj * nk)
+        rr_out[2 * n] = nj
+        rr_out[2 * n + 1] = nk
+        tt_out[n] = acos(max(-1.0, min(1.0, cos_tt)))
+
+
+def angles_kernel(cell, inv_cell, pos, ii, jj, kk):
+    cdef Py_ssize_t nn = len(ii)
+    rr = np.empty(2 * nn)
+    tt = np.empty(nn)
+    _angles(pos, cell, inv_cell, ii, jj, kk, rr, tt)
+    return rr, tt
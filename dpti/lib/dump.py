@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 
+import collections
+import itertools
 import os
 import sys
 
@@ -138,6 +140,47 @@ def system_data(lines):
     return system
 
 
+def iter_system_data(fname, skip=0):
+    # stream the frames of a lammps dump without holding the whole file
+    # in memory. relies on the fixed layout of a frame: 9 header lines
+    # followed by natoms atom lines. the first skip frames are passed
+    # over without parsing their atoms.
+    with open(fname) as fp:
+        iframe = 0
+        while True:
+            head = list(itertools.islice(fp, 9))
+            if len(head) == 0 or head[0].strip() == "":
+                break
+            if "ITEM: TIMESTEP" not in head[0] or "ITEM: ATOMS" not in head[8]:
+                raise RuntimeError(f"cannot parse the lammps dump {fname}")
+            natoms = int(head[3])
+            iframe += 1
+            if iframe <= skip:
+                collections.deque(itertools.islice(fp, natoms), maxlen=0)
+                continue
+            box_info = np.loadtxt(head[5:8], ndmin=2)
+            bounds = box_info[:, :2]
+            if box_info.shape[1] > 2:
+                tilt = box_info[:, 2]
+            else:
+                tilt = np.zeros([3])
+            keys = head[8].split()
+            id_idx = keys.index("id") - 2
+            tidx = keys.index("type") - 2
+            xidx = keys.index("x") - 2
+            yidx = keys.index("y") - 2
+            zidx = keys.index("z") - 2
+            blk = np.loadtxt(itertools.islice(fp, natoms), ndmin=2)
+            blk = blk[np.argsort(blk[:, id_idx], kind="stable")]
+            orig, cell = dumpbox2box(bounds, tilt)
+            system = {}
+            system["orig"] = np.array(orig)
+            system["cell"] = np.array(cell)
+            system["atom_types"] = blk[:, tidx].astype(int)
+            system["coordinates"] = blk[:, [xidx, yidx, zidx]]
+            yield system
+
+
 def split_traj(dump_lines):
     marks = []
     for idx, ii in enumerate(dump_lines):
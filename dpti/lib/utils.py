@@ -133,6 +133,27 @@ def block_avg(inp, skip=0, block_size=10):
     return block_avg, block_err
 
 
+def block_avg_multi(inp, skip=0, block_size=10):
+    # block_avg applied to every column of a 2d array in one pass.
+    # the columns are made contiguous so that the reductions are done in
+    # the same order as block_avg, giving identical results
+    inp = np.ascontiguousarray(np.asarray(inp)[skip:].T)
+    nblocks = inp.shape[1] // block_size
+    data_chunks = inp[:, : nblocks * block_size].reshape(-1, nblocks, block_size)
+    data_block = np.average(data_chunks, axis=2)
+    block_avg = np.average(data_block, axis=1)
+    if nblocks != 1:
+        block_err = np.std(data_block, axis=1) / np.sqrt(nblocks - 1)
+    else:
+        block_err = np.std(inp, axis=1) / np.sqrt(inp.shape[1] - 1)
+        warnings.warn(
+            "We only have one block when doing the block averaging. You may be choosing a too large stat_bsize value. Make sure this is what you want.",
+            RuntimeWarning,
+        )
+
+    return block_avg, block_err
+
+
 def cvt_conf(fin, fout, ofmt="vasp"):
     """Format convert from fin to fout, specify the output format by ofmt."""
     thisfile = os.path.abspath(__file__)
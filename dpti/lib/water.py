@@ -9,6 +9,20 @@ lib_path = os.path.dirname(os.path.realpath(__file__))
 sys.path.append(lib_path)
 import lmp as lmp
 
+try:
+    from dpti.lib.water_numba import angles_kernel
+
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    from dpti.lib._angles import angles_kernel as angles_kernel_cython
+
+    HAS_CYTHON = True
+except ImportError:
+    HAS_CYTHON = False
+
 
 def posi_diff(box, r0, r1):
     rbox = np.linalg.inv(box)
@@ -41,41 +55,88 @@ def posi_shift(box, r0, r1):
     return shift
 
 
-def compute_bonds(box, atype, posis, max_roh=1.3, uniq_hbond=True):
-    natoms = len(posis)
-    bonds = []
-    for ii in range(natoms):
-        bonds.append([])
-    for ii in range(natoms):
-        if atype[ii] == 1:
-            for jj in range(natoms):
-                if atype[jj] == 2:
-                    dr = posi_diff(box, posis[ii], posis[jj])
-                    if np.linalg.norm(dr) < max_roh:
-                        bonds[ii].append(jj)
-                        bonds[jj].append(ii)
+def compute_bond_pairs(
+    box, atype, posis, max_roh=1.3, uniq_hbond=True, inv_box=None, chunk_size=128
+):
+    # the O-H bonds as pairs (o_idx[bond_o], h_idx[bond_h]) sorted by O
+    # then by H; the distances are wrapped the same way as in posi_diff.
+    # the O atoms are processed chunk_size at a time to bound the memory
+    atype = np.asarray(atype)
+    posis = np.asarray(posis, dtype=np.float64)
+    if inv_box is None:
+        inv_box = np.linalg.inv(box)
+    o_idx = np.where(atype == 1)[0]
+    h_idx = np.where(atype == 2)[0]
+    if chunk_size is None:
+        chunk_size = len(o_idx)
+    chunk_size = max(1, chunk_size)
+    frac = posis @ inv_box
+    frac_h = frac[h_idx]
+    all_bond_o = [np.empty(0, dtype=int)]
+    all_bond_h = [np.empty(0, dtype=int)]
+    all_dist = [np.empty(0)]
+    for start in range(0, len(o_idx), chunk_size):
+        dp = frac[o_idx[start : start + chunk_size], None, :] - frac_h[None, :, :]
+        dp[dp >= 0.5] -= 1
+        dp[dp < -0.5] += 1
+        dr = dp @ box
+        dist = np.sqrt(np.einsum("ijk,ijk->ij", dr, dr))
+        bond_o, bond_h = np.nonzero(dist < max_roh)
+        all_bond_o.append(bond_o + start)
+        all_bond_h.append(bond_h)
+        all_dist.append(dist[bond_o, bond_h])
+    bond_o = np.concatenate(all_bond_o)
+    bond_h = np.concatenate(all_bond_h)
     if uniq_hbond:
-        for jj in range(natoms):
-            if atype[jj] == 2:
-                if len(bonds[jj]) > 1:
-                    orig_bonds = bonds[jj]
-                    min_bd = 1e10
-                    min_idx = -1
-                    for ii in bonds[jj]:
-                        dr = posi_diff(box, posis[ii], posis[jj])
-                        drr = np.linalg.norm(dr)
-                        # print(ii,jj, posis[ii], posis[jj], drr)
-                        if drr < min_bd:
-                            min_idx = ii
-                            min_bd = drr
-                    bonds[jj] = [min_idx]
-                    orig_bonds.remove(min_idx)
-                    # print(min_idx, orig_bonds, bonds[jj])
-                    for ii in orig_bonds:
-                        bonds[ii].remove(jj)
+        # an H atom bonded to several O atoms only keeps the closest one,
+        # the first O on a tie
+        dist = np.concatenate(all_dist)
+        order = np.lexsort((bond_o, dist, bond_h))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = bond_h[order[1:]] != bond_h[order[:-1]]
+        keep = np.sort(order[first])
+        bond_o = bond_o[keep]
+        bond_h = bond_h[keep]
+    return o_idx, h_idx, bond_o, bond_h
+
+
+def compute_bonds(box, atype, posis, max_roh=1.3, uniq_hbond=True, inv_box=None):
+    o_idx, h_idx, bond_o, bond_h = compute_bond_pairs(
+        box, atype, posis, max_roh=max_roh, uniq_hbond=uniq_hbond, inv_box=inv_box
+    )
+    bonds = [[] for ii in range(len(posis))]
+    for ii, jj in zip(o_idx[bond_o].tolist(), h_idx[bond_h].tolist()):
+        bonds[ii].append(jj)
+        bonds[jj].append(ii)
     return bonds
 
 
+def compute_angles(box, inv_box, posis, i_idx, j_idx, k_idx):
+    # distances r_ij, r_ik (interleaved) and angles j-i-k under the
+    # minimum image convention, e.g. the O-H bonds and H-O-H angles
+    posis = np.ascontiguousarray(posis, dtype=np.float64)
+    if HAS_NUMBA or HAS_CYTHON:
+        kernel = angles_kernel if HAS_NUMBA else angles_kernel_cython
+        return kernel(
+            np.ascontiguousarray(box, dtype=np.float64),
+            np.ascontiguousarray(inv_box, dtype=np.float64),
+            posis,
+            np.ascontiguousarray(i_idx, dtype=np.int64),
+            np.ascontiguousarray(j_idx, dtype=np.int64),
+            np.ascontiguousarray(k_idx, dtype=np.int64),
+        )
+    drj = posis[i_idx] - posis[j_idx]
+    drj -= np.rint(drj @ inv_box) @ box
+    drk = posis[i_idx] - posis[k_idx]
+    drk -= np.rint(drk @ inv_box) @ box
+    ndrj = np.sqrt(np.einsum("ij,ij->i", drj, drj))
+    ndrk = np.sqrt(np.einsum("ij,ij->i", drk, drk))
+    cos_tt = np.einsum("ij,ij->i", drj, drk) / (ndrj * ndrk)
+    rr = np.stack([ndrj, ndrk], axis=1).ravel()
+    tt = np.arccos(np.clip(cos_tt, -1.0, 1.0))
+    return rr, tt
+
+
 def add_bonds(lines_, max_roh=1.3):
     lines = lines_
     natoms = lmp.get_natoms_vec(lines)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import math
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True, fastmath=True)
+def _min_image(dr, cell, inv_cell):
+    # dr is a row vector, cell vectors are the rows of cell
+    frac = np.empty(3)
+    for dd in range(3):
+        frac[dd] = (
+            dr[0] * inv_cell[0, dd] + dr[1] * inv_cell[1, dd] + dr[2] * inv_cell[2, dd]
+        )
+        frac[dd] = np.rint(frac[dd])
+    for dd in range(3):
+        dr[dd] -= frac[0] * cell[0, dd] + frac[1] * cell[1, dd] + frac[2] * cell[2, dd]
+
+
+@njit(cache=True, parallel=True, fastmath=True)
+def angles_kernel(cell, inv_cell, pos, ii, jj, kk):
+    nn = len(ii)
+    rr = np.empty(2 * nn)
+    tt = np.empty(nn)
+    for n in prange(nn):
+        drj = pos[ii[n]] - pos[jj[n]]
+        drk = pos[ii[n]] - pos[kk[n]]
+        _min_image(drj, cell, inv_cell)
+        _min_image(drk, cell, inv_cell)
+        nj = math.sqrt(drj[0] * drj[0] + drj[1] * drj[1] + drj[2] * drj[2])
+        nk = math.sqrt(drk[0] * drk[0] + drk[1] * drk[1] + drk[2] * drk[2])
+        dot = drj[0] * drk[0] + drj[1] * drk[1] + drj[2] * drk[2]
+        rr[2 * n] = nj
+        rr[2 * n + 1] = nk
+        tt[n] = math.acos(max(-1.0, min(1.0, dot / (nj * nk))))
+    return rr, tt
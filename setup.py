@@ -0,0 +1,25 @@
+# the cython angle kernel of dpti.lib._angles is opt-in, so that the
+# default wheel stays pure python. build it with
+#   pip install cython setuptools setuptools_scm wheel
+#   DPTI_BUILD_CYTHON=1 pip install --no-build-isolation .
+# otherwise dpti falls back to numba or numpy.
+import os
+
+from setuptools import Extension, setup
+
+ext_modules = []
+if os.environ.get("DPTI_BUILD_CYTHON", "0") not in ("", "0"):
+    from Cython.Build import cythonize
+
+    ext_modules = cythonize(
+        [
+            Extension(
+                "dpti.lib._angles",
+                ["dpti/lib/_angles.pyx"],
+                extra_compile_args=["-O3"],
+            )
+        ],
+        language_level=3,
+    )
+
+setup(ext_modules=ext_modules)
@@ -169,6 +169,24 @@ class TestEquiHeader(unittest.TestCase):
         ret2 = dpti.equi.gen_equi_header(**input)
         self.assertEqual(ret1, ret2)
 
+    def test_equi_header_float_steps(self):
+        # json numbers such as 1e6 are read as floats
+        input = {
+            "nsteps": 1e6,
+            "thermo_freq": 10.0,
+            "dump_freq": 1e5,
+            "temp": 400,
+            "tau_t": 0.2,
+            "tau_p": 2.0,
+            "mass_map": [118.71],
+            "equi_conf": "conf.lmp",
+            "pres": None,
+        }
+        ret = dpti.equi.gen_equi_header(**input)
+        self.assertIn("variable        NSTEPS          equal 1000000\n", ret)
+        self.assertIn("variable        THERMO_FREQ     equal 10\n", ret)
+        self.assertIn("variable        DUMP_FREQ       equal 100000\n", ret)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,105 @@
+import os
+import shutil
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from context import dpti
+
+roh = 0.9572
+theta = np.deg2rad(104.52)
+
+
+hh = np.array(
+    [
+        [roh * np.sin(theta / 2), roh * np.cos(theta / 2), 0.0],
+        [-roh * np.sin(theta / 2), roh * np.cos(theta / 2), 0.0],
+    ]
+)
+
+
+def _gen_dump_frame(step, cell_len):
+    # two rigid water molecules, the second one wrapped across the box
+    o0 = np.array([2.0, 2.0, 2.0])
+    o1 = np.array([cell_len - 0.2, 5.0, cell_len - 0.5])
+    posis = [o0, o0 + hh[0], o0 + hh[1], o1, o1 + hh[0], o1 + hh[1]]
+    atype = [1, 2, 2, 1, 2, 2]
+    return _gen_dump_lines(step, cell_len, atype, posis)
+
+
+def _gen_proton_trans_frame(step, cell_len):
+    # the last H atom moves from the second O atom to the first one
+    o0 = np.array([2.0, 2.0, 2.0])
+    o1 = np.array([6.0, 6.0, 6.0])
+    h_extra = (o1 if step == 0 else o0) + np.array([0.0, 0.0, -1.0])
+    posis = [o0, o1, o0 + hh[0], o0 + hh[1], o1 + hh[0], o1 + hh[1], h_extra]
+    atype = [1, 1, 2, 2, 2, 2, 2]
+    return _gen_dump_lines(step, cell_len, atype, posis)
+
+
+def _gen_dump_lines(step, cell_len, atype, posis):
+    posis = [np.mod(pp, cell_len) for pp in posis]
+    ret = []
+    ret.append("ITEM: TIMESTEP")
+    ret.append(str(step))
+    ret.append("ITEM: NUMBER OF ATOMS")
+    ret.append(str(len(posis)))
+    ret.append("ITEM: BOX BOUNDS xy xz yz pp pp pp")
+    for _ in range(3):
+        ret.append(f"0.0 {cell_len:f} 0.0")
+    ret.append("ITEM: ATOMS id type x y z vx vy vz")
+    for idx, (tt, pp) in enumerate(zip(atype, posis)):
+        ret.append(f"{idx + 1} {tt} {pp[0]:.10f} {pp[1]:.10f} {pp[2]:.10f} 0 0 0")
+    return ret
+
+
+class TestEquiWaterBond(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.test_dir = "tmp_equi_water_bond"
+        os.mkdir(cls.test_dir)
+        lines = []
+        for ii, cell_len in enumerate([10.0, 10.0, 10.5, 9.8]):
+            lines += _gen_dump_frame(ii * 100, cell_len)
+        with open(os.path.join(cls.test_dir, "dump.equi"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+        cls.trans_dir = os.path.join(cls.test_dir, "proton_trans")
+        os.mkdir(cls.trans_dir)
+        lines = _gen_proton_trans_frame(0, 10.0) + _gen_proton_trans_frame(100, 10.0)
+        with open(os.path.join(cls.trans_dir, "dump.equi"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def setUp(self):
+        self.maxDiff = None
+
+    @patch("builtins.print")
+    def test_normal(self, patch_print):
+        rr, tt = dpti.equi.water_bond(self.test_dir, skip=1)
+        self.assertAlmostEqual(rr, roh, places=8)
+        self.assertAlmostEqual(tt, theta, places=8)
+        patch_print.assert_called_with("# statistics over 3 frames 6 angles")
+
+    @patch("builtins.print")
+    def test_skip_all(self, patch_print):
+        rr, tt = dpti.equi.water_bond(self.test_dir, skip=4)
+        self.assertTrue(np.isnan(rr))
+        self.assertTrue(np.isnan(tt))
+        patch_print.assert_called_with("# statistics over 0 frames 0 angles")
+
+    @patch("builtins.print")
+    def test_proton_trans(self, patch_print):
+        # the first two H atoms of both O atoms are unchanged, only the
+        # full bond table tells the transfer
+        rr, tt = dpti.equi.water_bond(self.trans_dir, skip=0)
+        self.assertAlmostEqual(rr, roh, places=8)
+        self.assertAlmostEqual(tt, theta, places=8)
+        patch_print.assert_any_call("proton trans detected at frame 1")
+        patch_print.assert_called_with("# statistics over 2 frames 4 angles")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.test_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import unittest
+
+import numpy as np
+from context import dpti
+
+from dpti.lib.utils import block_avg, integrate, integrate_sys_err
+
+thermo_header = (
+    "Step KinEng PotEng TotEng Enthalpy Temp Press Volume "
+    "c_e_diff[1] c_allmsd[1] c_allmsd[2] c_allmsd[3] c_allmsd[4]"
+)
+# task.9 is not padded, so it sorts after task.000010 by name
+task_names = ["task.%06d" % ii for ii in range(9)] + ["task.9", "task.000010"]
+
+
+class TestHtiLiqPostTask(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+        self.test_dir = "tmp_hti_liq_post"
+        self.natoms = 10
+        self.all_lambda = np.linspace(0, 1, len(task_names))
+        self.all_data = []
+        os.mkdir(self.test_dir)
+        rng = np.random.default_rng(2023)
+        for name, ll in zip(task_names, self.all_lambda):
+            task_dir = os.path.join(self.test_dir, name)
+            os.mkdir(task_dir)
+            data = rng.normal(size=(40, 13)) + np.arange(13) + ll
+            data[:, 0] = np.arange(40) * 100
+            with open(os.path.join(task_dir, "log.lammps"), "w") as f:
+                f.write("LAMMPS\n" + thermo_header + "\n")
+                for row in data:
+                    f.write(" ".join("%.10f" % xx for xx in row) + "\n")
+                f.write("Loop time of 1.0\n")
+            with open(os.path.join(task_dir, "lambda.out"), "w") as f:
+                f.write(str(ll))
+            self.all_data.append(data)
+        # a backup of a task directory is not a task
+        shutil.copytree(
+            os.path.join(self.test_dir, "task.000003"),
+            os.path.join(self.test_dir, "task.000003.bk000"),
+        )
+
+    def _write_jdata(self, **kwargs):
+        jdata = {"stat_skip": 2, "stat_bsize": 5, **kwargs}
+        with open(os.path.join(self.test_dir, "in.json"), "w") as f:
+            json.dump(jdata, f)
+
+    def _serial_post(self):
+        all_dp_a = []
+        all_dp_e = []
+        for data in self.all_data:
+            dp_a, dp_e = block_avg(data[:, 8], skip=2, block_size=5)
+            all_dp_a.append(dp_a / self.natoms)
+            all_dp_e.append(dp_e / self.natoms)
+        all_dp_a = np.array(all_dp_a)
+        all_dp_e = np.array(all_dp_e)
+        diff_e, err = integrate(self.all_lambda, all_dp_a, all_dp_e)
+        sys_err = integrate_sys_err(self.all_lambda, all_dp_a)
+        return diff_e, err, sys_err, all_dp_a
+
+    def test_serial(self):
+        self._write_jdata()
+        diff_e, (err, sys_err), thermo_info = dpti.hti_liq._post_tasks(
+            self.test_dir, "soft_on", self.natoms
+        )
+        diff_e_0, err_0, sys_err_0, all_dp_a = self._serial_post()
+        self.assertAlmostEqual(diff_e, diff_e_0, places=8)
+        self.assertAlmostEqual(err, err_0, places=8)
+        self.assertAlmostEqual(sys_err, sys_err_0, places=8)
+        hti_out = np.loadtxt(os.path.join(self.test_dir, "hti.out"))
+        np.testing.assert_almost_equal(hti_out[:, 0], self.all_lambda)
+        np.testing.assert_almost_equal(hti_out[:, 1], all_dp_a)
+        np.testing.assert_almost_equal(
+            hti_out[:, 3], [data[-1, 12] for data in self.all_data]
+        )
+        last_log = os.path.join(self.test_dir, task_names[-1], "log.lammps")
+        self.assertEqual(
+            thermo_info,
+            dpti.hti_liq._compute_thermo(last_log, self.natoms, 2, 5),
+        )
+        for name in task_names:
+            self.assertFalse(os.path.exists(os.path.join(self.test_dir, name, "data")))
+
+    def test_post_workers(self):
+        self._write_jdata()
+        ret_serial = dpti.hti_liq._post_tasks(self.test_dir, "soft_on", self.natoms)
+        self._write_jdata(post_workers=2)
+        ret_parallel = dpti.hti_liq._post_tasks(self.test_dir, "soft_on", self.natoms)
+        self.assertEqual(ret_serial, ret_parallel)
+
+    def test_dump_data_txt(self):
+        self._write_jdata(dump_data_txt=True)
+        dpti.hti_liq._post_tasks(self.test_dir, "soft_on", self.natoms)
+        for name, data in zip(task_names, self.all_data):
+            dumped = np.loadtxt(os.path.join(self.test_dir, name, "data"))
+            np.testing.assert_allclose(dumped, data, rtol=1e-5)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
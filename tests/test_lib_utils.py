@@ -5,7 +5,13 @@ import unittest
 import numpy as np
 from numpy.testing import assert_almost_equal
 
-from dpti.lib.utils import block_avg, integrate_range_hti, parse_seq, relative_link_file
+from dpti.lib.utils import (
+    block_avg,
+    block_avg_multi,
+    integrate_range_hti,
+    parse_seq,
+    relative_link_file,
+)
 
 lambda_seq = [
     "0.00:0.05:0.010",
@@ -108,6 +114,20 @@ class TestBlockAvg(unittest.TestCase):
         self.assertAlmostEqual(err1, err2, places=8)
 
 
+class TestBlockAvgMulti(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+
+    def test_normal(self):
+        data_file = "lammps_test_files/get_thermo.data"
+        data_array = np.loadtxt(data_file)
+        avg2, err2 = block_avg_multi(data_array[:, 1:8], skip=3, block_size=5)
+        for ii in range(7):
+            avg1, err1 = block_avg(data_array[:, ii + 1], skip=3, block_size=5)
+            self.assertAlmostEqual(avg1, avg2[ii], places=8)
+            self.assertAlmostEqual(err1, err2[ii], places=8)
+
+
 class TestIntegrateRangeHti(unittest.TestCase):
     def setUp(self):
         self.maxDiff = None
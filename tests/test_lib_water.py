@@ -0,0 +1,121 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from dpti.lib import water
+from dpti.lib.water import compute_angles, compute_bond_pairs, compute_bonds, posi_diff
+
+
+class TestComputeBonds(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+        self.box = np.array([[6.0, 0.0, 0.0], [0.5, 6.0, 0.0], [0.3, -0.2, 6.0]])
+        # O 0 and O 3 compete for H 5, H 2 is bonded across the boundary
+        self.atype = [1, 2, 2, 1, 2, 2]
+        self.posis = np.array(
+            [
+                [1.0, 1.0, 1.0],
+                [1.9, 1.3, 1.0],
+                [5.8, 1.1, 1.2],
+                [1.0, 3.1, 1.0],
+                [1.7, 3.7, 1.2],
+                [1.0, 2.2, 1.0],
+            ]
+        )
+
+    def test_uniq_hbond(self):
+        bonds = compute_bonds(self.box, self.atype, self.posis)
+        self.assertEqual(bonds, [[1, 2], [0], [0], [4, 5], [3], [3]])
+
+    def test_not_uniq(self):
+        bonds = compute_bonds(self.box, self.atype, self.posis, uniq_hbond=False)
+        self.assertEqual(bonds, [[1, 2, 5], [0], [0], [4, 5], [3], [0, 3]])
+
+    def test_inv_box(self):
+        inv_box = np.linalg.inv(self.box)
+        self.assertEqual(
+            compute_bonds(self.box, self.atype, self.posis, inv_box=inv_box),
+            compute_bonds(self.box, self.atype, self.posis),
+        )
+
+    def test_bond_length(self):
+        bonds = compute_bonds(self.box, self.atype, self.posis)
+        for ii in [0, 3]:
+            for jj in bonds[ii]:
+                dr = posi_diff(self.box, self.posis[ii], self.posis[jj])
+                self.assertLess(np.linalg.norm(dr), 1.3)
+
+    def test_chunk_size(self):
+        # a dense random configuration, many H atoms are shared by O atoms
+        rng = np.random.default_rng(0)
+        box = self.box + np.diag([2.0, 2.0, 2.0])
+        atype = rng.permutation([1] * 40 + [2] * 80)
+        posis = rng.random((120, 3)) @ box
+        for uniq_hbond in [True, False]:
+            dense = compute_bond_pairs(
+                box, atype, posis, max_roh=2.0, uniq_hbond=uniq_hbond, chunk_size=None
+            )
+            for chunk_size in [1, 7, 128]:
+                chunked = compute_bond_pairs(
+                    box,
+                    atype,
+                    posis,
+                    max_roh=2.0,
+                    uniq_hbond=uniq_hbond,
+                    chunk_size=chunk_size,
+                )
+                for aa, bb in zip(dense, chunked):
+                    np.testing.assert_array_equal(aa, bb)
+        # without uniq_hbond some H atoms appear in several bonds
+        self.assertLess(len(np.unique(dense[3])), len(dense[3]))
+
+
+class TestComputeAngles(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.box = np.diag([10.0, 11.0, 12.0]) + np.triu(rng.random((3, 3)), 1)
+        self.inv_box = np.linalg.inv(self.box)
+        self.posis = rng.random((300, 3)) @ self.box
+        self.i_idx = np.arange(100)
+        self.j_idx = self.i_idx + 100
+        self.k_idx = self.i_idx + 200
+
+    def _compute(self, has_numba, has_cython):
+        with patch.multiple(water, HAS_NUMBA=has_numba, HAS_CYTHON=has_cython):
+            return compute_angles(
+                self.box, self.inv_box, self.posis, self.i_idx, self.j_idx, self.k_idx
+            )
+
+    def test_numpy(self):
+        rr, tt = self._compute(False, False)
+        self.assertEqual(rr.shape, (200,))
+        self.assertEqual(tt.shape, (100,))
+        for n in [0, 57]:
+            drj = posi_diff(self.box, self.posis[n], self.posis[n + 100])
+            drk = posi_diff(self.box, self.posis[n], self.posis[n + 200])
+            ndrj = np.linalg.norm(drj)
+            ndrk = np.linalg.norm(drk)
+            self.assertAlmostEqual(rr[2 * n], ndrj, places=10)
+            self.assertAlmostEqual(rr[2 * n + 1], ndrk, places=10)
+            self.assertAlmostEqual(
+                tt[n], np.arccos(np.dot(drj, drk) / (ndrj * ndrk)), places=10
+            )
+
+    @unittest.skipUnless(water.HAS_NUMBA, "numba is not installed")
+    def test_numba(self):
+        rr_0, tt_0 = self._compute(False, False)
+        rr, tt = self._compute(True, False)
+        np.testing.assert_allclose(rr, rr_0, rtol=0, atol=1e-12)
+        np.testing.assert_allclose(tt, tt_0, rtol=0, atol=1e-12)
+
+    @unittest.skipUnless(water.HAS_CYTHON, "the cython extension is not built")
+    def test_cython(self):
+        rr_0, tt_0 = self._compute(False, False)
+        rr, tt = self._compute(False, True)
+        np.testing.assert_allclose(rr, rr_0, rtol=0, atol=1e-12)
+        np.testing.assert_allclose(tt, tt_0, rtol=0, atol=1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()